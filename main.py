@@ -1,11 +1,31 @@
+import os
+from dataclasses import dataclass
+
 import pygame
 import moderngl
 
 from setup_win import setup_pygame_opengl
-from shaders import create_shaders
-from shapes.circle import Circle, color_from_temperature, temperature_from_mass
+from shaders import create_circle_shaders, create_fabric_shaders, create_shaders
+from shapes import Circle, color_from_temperature, temperature_from_mass
 from space_fabric import SpaceFabric
 
+# --- CONFIGURATION ---
+# Set SPACE_FABRIC_DEBUG=1 to log mass changes (kept off the input path otherwise)
+DEBUG = os.environ.get("SPACE_FABRIC_DEBUG", "0") not in ("", "0")
+
+@dataclass
+class SimConfig:
+    """Simulation options; the defaults reproduce the standard interactive scene"""
+    width: int = 800
+    height: int = 600
+    msaa: bool = True             # 4x multisampling for smooth edges
+    drag: bool = True             # Allow dragging the sun with the left mouse button
+    gpu_deformation: bool = True  # Deform the fabric in the vertex shader when supported
+    fabric_rows: int = 25
+    fabric_cols: int = 25
+    sun_segments: int = 128
+
+
 # --- SETUP ---
 def init_context():
     ctx = moderngl.create_context()
@@ -18,12 +38,24 @@ def init_shaders(ctx):
     vertex_shader, fragment_shader = create_shaders()
     return ctx.program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
 
-def init_fabric(ctx, program):
-    fabric = SpaceFabric(rows=25, cols=25)
+def init_circle_shaders(ctx):
+    vertex_shader, fragment_shader = create_circle_shaders()
+    return ctx.program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+
+def init_fabric_shaders(ctx, fallback_program):
+    """Compile the GPU fabric deformation shader, falling back to the CPU path if unsupported"""
+    vertex_shader, fragment_shader = create_fabric_shaders()
+    try:
+        return ctx.program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+    except moderngl.Error:
+        return fallback_program
+
+def init_fabric(ctx, program, rows=25, cols=25):
+    fabric = SpaceFabric(rows=rows, cols=cols)
     fabric.setup_vao(ctx, program)
     return fabric
 
-def init_sun(ctx, program, aspect_ratio):
+def init_sun(ctx, program, aspect_ratio, segments=128):
     sun_radius = 0.1
     real_sun_mass = 1.989e30
     sun_color = color_from_temperature(temperature_from_mass(real_sun_mass))  # yellow
@@ -35,7 +67,7 @@ def init_sun(ctx, program, aspect_ratio):
         radius=sun_radius,
         color=sun_color,
         mass=real_sun_mass,
-        segments=128,
+        segments=segments,
         aspect_ratio=aspect_ratio
     )
     sun.setup_vao(ctx, program)
@@ -56,8 +88,8 @@ def is_point_in_circle(px, py, circle):
     """Check if point (px, py) is inside the circle"""
     dx = px - circle.x
     dy = py - circle.y
-    distance = (dx * dx + dy * dy) ** 0.5
-    return distance <= circle.radius
+    # Compare squared distances to avoid the square root
+    return dx * dx + dy * dy <= circle.radius * circle.radius
 
 def handle_mouse_down(pos, sun, width, height, aspect_ratio):
     """Handle mouse button down event"""
@@ -74,20 +106,11 @@ def handle_mouse_motion(pos, sun, fabric, width, height, aspect_ratio):
     mouse_x, mouse_y = pos
     ndc_x, ndc_y = screen_to_ndc(mouse_x, mouse_y, width, height, aspect_ratio)
     
-    # The radius is already scaled by aspect_ratio in the circle's vertex generation
-    # So we need to account for that when calculating boundaries
-    radius_x = sun.radius
-    radius_y = sun.radius
-    
     # Clamp position to keep circle within window borders
     # X boundaries: NDC x is already multiplied by aspect_ratio in screen_to_ndc
-    min_x = -1.0 + radius_x
-    max_x = 1.0 - radius_x
+    # The bounds only change with the radius, so the circle caches them
+    min_x, max_x, min_y, max_y = sun.drag_bounds
     ndc_x = max(min_x, min(ndc_x, max_x))
-    
-    # Y boundaries
-    min_y = -1.0 + radius_y
-    max_y = 1.0 - radius_y
     ndc_y = max(min_y, min(ndc_y, max_y))
     
     # Update sun position
@@ -95,10 +118,9 @@ def handle_mouse_motion(pos, sun, fabric, width, height, aspect_ratio):
     
     # Update fabric deformation
     fabric.update_fabric_deformation()
-    fabric.update_gpu_data()
 
 def handle_input(event, sun, fabric, dragging, width, height, aspect_ratio):
-    """Handle all input events"""
+    """Handle all input events except drag motion, which the main loop coalesces per frame"""
     new_dragging = dragging
     
     if event.type == pygame.MOUSEBUTTONDOWN:
@@ -110,21 +132,17 @@ def handle_input(event, sun, fabric, dragging, width, height, aspect_ratio):
         if event.button == 1:  # Left mouse button
             new_dragging = False
     
-    elif event.type == pygame.MOUSEMOTION:
-        if dragging:
-            handle_mouse_motion(event.pos, sun, fabric, width, height, aspect_ratio)
-    
     elif event.type == pygame.KEYDOWN:
         if event.key == pygame.K_UP:
             sun.set_mass(sun.mass * 1.1)
-            print(f"Sun mass: {sun.mass:.2e}")
+            if DEBUG:
+                print(f"Sun mass: {sun.mass:.2e}")
             fabric.update_fabric_deformation()
-            fabric.update_gpu_data()
         elif event.key == pygame.K_DOWN:
             sun.set_mass(sun.mass * 0.9)
-            print(f"Sun mass: {sun.mass:.2e}")
+            if DEBUG:
+                print(f"Sun mass: {sun.mass:.2e}")
             fabric.update_fabric_deformation()
-            fabric.update_gpu_data()
     
     return new_dragging
 
@@ -138,34 +156,51 @@ def render(ctx, sun, fabric):
 
 
 # --- MAIN LOOP ---
-def main():
-    screen, width, height = setup_pygame_opengl()
+def main(config=None):
+    config = config or SimConfig()
+    screen, width, height = setup_pygame_opengl(config.width, config.height, config.msaa)
     ctx = init_context()
     program = init_shaders(ctx)
 
     aspect_ratio = width / height
-    fabric = init_fabric(ctx, program)
-    sun = init_sun(ctx, program, aspect_ratio)
+    fabric_program = init_fabric_shaders(ctx, program) if config.gpu_deformation else program
+    fabric = init_fabric(ctx, fabric_program, config.fabric_rows, config.fabric_cols)
+    sun = init_sun(ctx, init_circle_shaders(ctx), aspect_ratio, config.sun_segments)
 
     fabric.add_gravitational_body(sun)
 
     # Initial physics deformation
     fabric.update_fabric_deformation()
-    fabric.update_gpu_data()
 
     clock = pygame.time.Clock()
     running = True
     dragging = False
+    # The scene only changes on input, so frames are rendered on demand
+    dirty = True
 
     while running:
+        drag_pos = None
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.MOUSEMOTION:
+                if dragging:
+                    drag_pos = event.pos  # Only the latest position matters this frame
             else:
-                dragging = handle_input(event, sun, fabric, dragging, width, height, aspect_ratio)
-
-        render(ctx, sun, fabric)
-        clock.tick(60)
+                dragging = handle_input(event, sun, fabric, dragging, width, height, aspect_ratio) and config.drag
+                dirty = True  # Key presses, clicks, window exposes, ...
+
+        # Apply all motion events of this frame as a single sun/fabric update
+        if drag_pos is not None:
+            handle_mouse_motion(drag_pos, sun, fabric, width, height, aspect_ratio)
+            dirty = True
+
+        if dirty:
+            render(ctx, sun, fabric)
+            dirty = False
+            clock.tick(60)  # Caps the frame rate while dragging
+        else:
+            pygame.time.wait(5)  # Idle: sleep instead of redrawing a static scene
 
     pygame.quit()
 
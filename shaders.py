@@ -29,3 +29,77 @@ def create_shaders():
     """
 
     return vertex_shader, fragment_shader
+
+
+# Upper bound on gravitational bodies the fabric shader can deform against
+MAX_BODIES = 16
+
+
+def create_fabric_shaders():
+    """Create shaders that deform the space fabric on the GPU from per-body uniforms."""
+
+    # --- VERTEX SHADER ---
+    # Same smooth inward pull as SpaceFabric.update_fabric_deformation, evaluated per vertex
+    vertex_shader = """
+    #version 330
+    #define MAX_BODIES %d
+    // Vertex attributes
+    in vec2 position;      // Flat (undeformed) grid position
+    in vec4 color;         // RGBA color input
+
+    // Gravitational bodies
+    uniform int u_num_bodies;
+    uniform vec3 u_bodies[MAX_BODIES];  // xy = body position, z = max displacement
+    uniform float u_falloff;
+
+    // Output to fragment shader
+    out vec4 vertex_color;
+
+    void main() {
+        vec2 pull = vec2(0.0);
+        for (int i = 0; i < u_num_bodies; ++i) {
+            vec2 d = position - u_bodies[i].xy;
+            float dist_sq = dot(d, d);
+            float magnitude = u_bodies[i].z / (1.0 + dist_sq / (u_falloff * u_falloff));
+            if (dist_sq > 1e-8) {  // dist > 1e-4
+                pull += d * inversesqrt(dist_sq) * magnitude;  // Inward pull towards the body
+            }
+        }
+        gl_Position = vec4(position - pull, 0.0, 1.0);
+        vertex_color = color;
+    }
+    """ % MAX_BODIES
+
+    # --- FRAGMENT SHADER ---
+    _, fragment_shader = create_shaders()
+
+    return vertex_shader, fragment_shader
+
+
+def create_circle_shaders():
+    """Create shaders that place a unit circle mesh from position, radius and color uniforms."""
+
+    # --- VERTEX SHADER ---
+    vertex_shader = """
+    #version 330
+    // Vertex attributes
+    in vec2 position;      // Unit circle vertex, relative to the center
+
+    // Per-circle parameters
+    uniform vec2 u_offset; // Circle center
+    uniform float u_radius;
+    uniform vec4 u_color;  // RGBA color
+
+    // Output to fragment shader
+    out vec4 vertex_color;
+
+    void main() {
+        gl_Position = vec4(u_offset + position * u_radius, 0.0, 1.0);
+        vertex_color = u_color;
+    }
+    """
+
+    # --- FRAGMENT SHADER ---
+    _, fragment_shader = create_shaders()
+
+    return vertex_shader, fragment_shader
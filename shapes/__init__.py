@@ -0,0 +1,3 @@
+from shapes.circle import Circle, color_from_temperature, temperature_from_mass
+
+__all__ = ["Circle", "color_from_temperature", "temperature_from_mass"]
@@ -1,4 +1,6 @@
 # shapes/circle.py
+import math
+
 import numpy as np
 import moderngl
 
@@ -12,88 +14,103 @@ def temperature_from_mass(mass, sun_mass=1.989e30):
     return max(3000, min(30000, temp))
 
 
+# Spectral class boundaries (K) and their colors; a temperature maps to the
+# color of the first boundary it does not exceed (M, K, G, F, A, B, O)
+_TEMP_THRESH = np.array([3700, 5200, 6000, 7500, 10000, 20000], dtype=np.float32)
+_TEMP_COLORS = np.array([
+    [1.0, 0.0, 0.0, 0.8],    # M-type (red dwarf)
+    [1.0, 0.4, 0.4, 0.8],    # K-type
+    [1.0, 0.95, 0.4, 0.8],   # G-type (Sun)
+    [1.0, 0.9, 0.7, 0.8],    # F-type
+    [0.7, 0.7, 0.9, 0.8],    # A-type
+    [0.6, 0.6, 1.0, 0.8],    # B-type
+    [0.6, 0.7, 1.0, 0.8],    # O-type
+], dtype=np.float32)
+
+
 def color_from_temperature(temp):
     """Approximate star color from temperature (K)."""
-    print(temp)
-    if temp > 20000:   # O-type
-        return (0.6, 0.7, 1.0, 0.8)
-    elif temp > 10000: # B-type
-        return (0.6, 0.6, 1.0, 0.8)
-    elif temp > 7500:  # A-type
-        return (0.7, 0.7, 0.9, 0.8)
-    elif temp > 6000:  # F-type
-        return (1.0, 0.9, 0.7, 0.8)
-    elif temp > 5200:  # G-type (Sun)
-        return (1.0, 0.95, 0.4, 0.8)
-    elif temp > 3700:  # K-type
-        return (1.0, 0.4, 0.4, 0.8)
-    else:              # M-type (red dwarf)
-        return (1.0, 0.0, 0.0, 0.8)
+    return tuple(_TEMP_COLORS[np.searchsorted(_TEMP_THRESH, temp)].tolist())
 
 
 class Circle:
+    # Fixed attribute layout: smaller instances and faster attribute access on the hot paths
+    __slots__ = (
+        'x', 'y', 'base_radius', 'radius', 'drag_bounds', 'color', 'mass',
+        '_scaling_factor', 'segments', 'aspect_ratio',
+        'indices', 'vertices', 'program', 'vbo', 'ibo', 'vao',
+    )
+
     def __init__(self, x: float, y: float, radius: float, color: tuple, mass: float = 1.0, segments: int = 64, aspect_ratio: float = 1.0):
         self.x = x
         self.y = y
         self.base_radius = radius  # Store initial radius
         self.radius = radius
+        self.drag_bounds = self._compute_drag_bounds()
         self.color = color
         self.mass = mass  # Mass property for gravitational effects
+        self._scaling_factor = 0.08 * mass / 1.989e30  # See get_gravitational_effect
         self.segments = segments
         self.aspect_ratio = aspect_ratio
 
-        # Generate vertex and index data
-        self.vertices, self.indices = self._generate_vertices()
+        # Geometry is a unit circle around the origin; position, radius and color are
+        # shader uniforms, so it is uploaded once and never rewritten
+        self.indices = self._generate_indices()
+        self.vertices = self._generate_vertices()
 
         # ModernGL resources
+        self.program = None
         self.vbo = None
         self.ibo = None
         self.vao = None
 
-    def _generate_vertices(self):
-        """Generate vertex and index data for a circle (triangle fan) with Z-coordinate for depth"""
-        vertices = [[self.x, self.y, 0.1, *self.color]]  # center with positive Z for depth
-        for i in range(self.segments + 1):
-            angle = 2 * np.pi * i / self.segments
-            ex = self.x + self.radius * np.cos(angle) / self.aspect_ratio
-            ey = self.y + self.radius * np.sin(angle)
-            vertices.append([ex, ey, 0.1, *self.color])  # edge vertices with positive Z
+    def _compute_drag_bounds(self):
+        """(min_x, max_x, min_y, max_y) center limits that keep the circle inside NDC"""
+        return (-1.0 + self.radius, 1.0 - self.radius, -1.0 + self.radius, 1.0 - self.radius)
 
-        indices = []
-        for i in range(self.segments):
-            indices.extend([0, i + 1, i + 2])
+    def _generate_indices(self):
+        """Generate index data for the triangle fan (center, edge i, edge i+1), 16-bit while it fits"""
+        index_dtype = np.uint16 if self.segments + 2 <= 65536 else np.uint32
+        indices = np.empty((self.segments, 3), dtype=index_dtype)
+        indices[:, 0] = 0
+        indices[:, 1] = np.arange(1, self.segments + 1)
+        indices[:, 2] = np.arange(2, self.segments + 2)
+        return indices.ravel()
 
-        return np.array(vertices, dtype=np.float32), np.array(indices, dtype=np.uint32)
+    def _generate_vertices(self):
+        """Generate unit circle (triangle fan) vertex positions, aspect-corrected and centered at the origin"""
+        angles = np.linspace(0, 2 * np.pi, self.segments + 1, endpoint=True, dtype=np.float32)
+        vertices = np.zeros((self.segments + 2, 2), dtype=np.float32)  # center stays at (0, 0)
+        vertices[1:, 0] = np.cos(angles) / np.float32(self.aspect_ratio)
+        vertices[1:, 1] = np.sin(angles)
+        return vertices
 
     def setup_vao(self, ctx: moderngl.Context, program: moderngl.Program):
-        """Create ModernGL buffers and VAO using the provided context and shader program"""
-        self.vbo = ctx.buffer(self.vertices.tobytes())
-        self.ibo = ctx.buffer(self.indices.tobytes())
-        self.vao = ctx.vertex_array(program, [(self.vbo, '3f 4f', 'position', 'color')], self.ibo)
+        """Create ModernGL buffers and VAO using the provided context and circle shader program"""
+        self.program = program
+        self.vbo = ctx.buffer(self.vertices)
+        self.ibo = ctx.buffer(self.indices)
+        self.vao = ctx.vertex_array(program, [(self.vbo, '2f', 'position')], self.ibo,
+                                    index_element_size=self.indices.itemsize)
 
     def draw(self, ctx=None):
         """Render the circle if VAO is set up"""
         if self.vao is None:
             print("Circle VAO not set up yet!")
             return
+        self.program['u_offset'].value = (self.x, self.y)
+        self.program['u_radius'].value = self.radius
+        self.program['u_color'].value = self.color
         self.vao.render()
 
-    def _update_vertex_buffer(self):
-        """Helper method to update the vertex buffer without recreating it"""
-        if self.vbo:
-            self.vertices, self.indices = self._generate_vertices()
-            self.vbo.write(self.vertices.tobytes())
-
     def set_position(self, x: float, y: float):
-        """Update the circle's position"""
+        """Update the circle's position (applied as a uniform when drawn)"""
         self.x = x
         self.y = y
-        self._update_vertex_buffer()
 
     def set_color(self, color: tuple):
-        """Update the circle's color"""
+        """Update the circle's color (applied as a uniform when drawn)"""
         self.color = color
-        self._update_vertex_buffer()
     
     def set_mass(self, mass: float):
         """Update the circle's mass with limits and scale radius slightly for visualization"""
@@ -104,19 +121,18 @@ class Circle:
 
         # Clamp the mass
         self.mass = max(min_mass, min(mass, max_mass))
+        self._scaling_factor = 0.08 * self.mass / solar_mass
 
         # Optional: scale radius slightly based on mass change (relative to base_radius)
         scale_factor = 0.6  # how much radius changes relative to base radius
         mass_ratio = (self.mass - min_mass) / (max_mass - min_mass)
         self.radius = self.base_radius * (1 + scale_factor * mass_ratio)
+        self.drag_bounds = self._compute_drag_bounds()
 
         # Change color according to the mass
         temp = temperature_from_mass(self.mass, solar_mass)
         self.color = color_from_temperature(temp)
 
-        # Update vertex buffer
-        self._update_vertex_buffer()
-
     def get_gravitational_effect(self, x: float, y: float) -> float:
         """
         Calculate the gravitational effect at a given point (x, y).
@@ -124,20 +140,17 @@ class Circle:
         """
         dx = x - self.x
         dy = y - self.y
-        distance = np.sqrt(dx * dx + dy * dy)
+        distance = math.sqrt(dx * dx + dy * dy)
         
-        # Add smoothing factor to avoid singularity at the center
-        smoothing_factor = 0.05
-        
-        # Gravitational effect scaled for main sequence stars (0.5☉ - 8☉)
-        # Use solar mass as reference for scaling
-        solar_mass = 1.989e30
-        mass_in_solar_units = self.mass / solar_mass
-        
-        # Scale effect based on solar mass ratio with good visualization range
-        scaling_factor = 0.08 * mass_in_solar_units  # Proportional to actual mass
-        
-        # Use softer falloff for wider visible range
-        effect = scaling_factor / (distance + smoothing_factor)
-        
-        return effect
\ No newline at end of file
+        # Add smoothing factor (0.05) to avoid singularity at the center.
+        # The scaling factor is 0.08 * mass in solar units (cached when the mass changes),
+        # with a softer falloff for wider visible range.
+        return self._scaling_factor / (distance + 0.05)
+
+    def get_gravitational_effect_vec(self, xs, ys):
+        """
+        Vectorized get_gravitational_effect for arrays of points.
+        xs and ys only need to broadcast against each other (e.g. np.ogrid coordinates).
+        """
+        distance = np.hypot(xs - self.x, ys - self.y)
+        return self._scaling_factor / (distance + 0.05)
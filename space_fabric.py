@@ -2,6 +2,78 @@
 import numpy as np
 import moderngl
 
+from shaders import MAX_BODIES
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the NumPy path is used without it
+    njit = None
+
+SOLAR_MASS = 1.989e30
+# Displacement = Max_Displacement / (1 + (Normalized_Distance / Falloff_Rate)^2)
+FALLOFF_RATE = 0.35  # Slightly wider curve than before
+# float32 constants for the CPU paths, so NumPy/Numba arithmetic never widens to float64
+INV_FALLOFF_SQ = np.float32(1.0 / FALLOFF_RATE**2)
+MIN_DISTANCE_SQ = np.float32(1e-8)  # distance > 1e-4 before a body pulls a vertex
+# The Numba kernel skips pulls below this (in NDC, well under a pixel),
+# see SpaceFabric.cutoff_distance_sq
+PULL_EPSILON = 1e-3
+# What the fabric reads from a gravitational body (Circle provides all of them)
+BODY_ATTRIBUTES = ('x', 'y', 'mass')
+
+
+def _deform_kernel(grid_x, grid_y, body_x, body_y, body_md, body_cutoff_sq, inv_falloff_sq, out):
+    """
+    Write the deformed (rows, cols, 2) grid into out in a single fused pass, in float32.
+    Same pull as the NumPy path of SpaceFabric.update_fabric_deformation and the shader,
+    except that this kernel also skips pulls below PULL_EPSILON beyond each body's
+    cutoff distance (body_cutoff_sq); it is the only path that does.
+    """
+    one = np.float32(1.0)
+    for j in prange(grid_y.shape[0]):
+        y = grid_y[j]
+        for i in range(grid_x.shape[0]):
+            x = grid_x[i]
+            pull_x = np.float32(0.0)
+            pull_y = np.float32(0.0)
+            for k in range(body_x.shape[0]):
+                dx = x - body_x[k]
+                dy = y - body_y[k]
+                distance_sq = dx * dx + dy * dy
+                if MIN_DISTANCE_SQ < distance_sq < body_cutoff_sq[k]:
+                    scale = body_md[k] / (one + distance_sq * inv_falloff_sq) / np.sqrt(distance_sq)
+                    pull_x += dx * scale
+                    pull_y += dy * scale
+            out[j, i, 0] = x - pull_x
+            out[j, i, 1] = y - pull_y
+
+
+if njit is not None:
+    _deform_kernel = njit(parallel=True, fastmath=True, cache=True)(_deform_kernel)
+else:
+    _deform_kernel = None
+
+# Line indices only depend on the grid shape, so they are shared between fabrics
+_INDEX_CACHE: dict[tuple[int, int], np.ndarray] = {}
+
+
+def _grid_line_indices(rows, cols):
+    """
+    Line indices for the horizontal then vertical grid lines (16-bit while they fit).
+    The returned array is cached per (rows, cols) and read-only.
+    """
+    indices = _INDEX_CACHE.get((rows, cols))
+    if indices is None:
+        index_dtype = np.uint16 if rows * cols <= 65536 else np.uint32
+        ids = np.arange(rows * cols, dtype=index_dtype).reshape(rows, cols)
+        horizontal = np.stack([ids[:, :-1], ids[:, 1:]], axis=-1).reshape(-1, 2)
+        vertical = np.stack([ids[:-1, :].T, ids[1:, :].T], axis=-1).reshape(-1, 2)
+        indices = np.concatenate([horizontal, vertical]).ravel()
+        indices.setflags(write=False)
+        _INDEX_CACHE[(rows, cols)] = indices
+    return indices
+
+
 class SpaceFabric:
     """
     Represents the 2D space fabric (background) as a visible mesh/grid
@@ -12,54 +84,64 @@ class SpaceFabric:
         # Increased rows/cols from 20 to 25 to match main.py initialization
         self.rows = rows
         self.cols = cols
-        self.original_vertices = None
-        self.vertices = None
+        # Positions and colors live in separate buffers: only positions change per update
+        self.original_positions = None
+        self.positions = None
+        self.colors = None
         self.indices = None
         self.vao = None
-        self.vbo = None
+        self.pos_vbo = None
+        self.col_vbo = None
         self.ibo = None
+        self.program = None
+        # True when the shader deforms the grid itself (see shaders.create_fabric_shaders)
+        self.gpu_deformation = False
+        self._body_uniforms = np.zeros((MAX_BODIES, 3), dtype=np.float32)
+        self._grid_x = None
+        self._grid_y = None
         self.gravitational_bodies = []
+        # Per-body parameters, sized on add/remove and refilled on each update
+        self._body_x = np.empty(0, dtype=np.float32)
+        self._body_y = np.empty(0, dtype=np.float32)
+        self._body_md = np.empty(0, dtype=np.float32)
+        self._body_cutoff_sq = np.empty(0, dtype=np.float32)
+        # Mass each _body_md entry was computed from (float64 so equal masses compare equal)
+        self._body_mass = np.empty(0, dtype=np.float64)
+        self._scratch = None  # NumPy deformation temporaries, see update_fabric_deformation
 
     def generate_base_grid(self):
         """
         Generate the base grid structure (original positions).
         """
-        vertices = []
-        dx = 2.2 / (self.cols - 1)
-        dy = 2.2 / (self.rows - 1)
-
-        for j in range(self.rows):
-            for i in range(self.cols):
-                x = -1.1 + i * dx
-                y = -1.1 + j * dy
-                gray = 0.2
-                # Z is 0.0, as we are performing a 2D effect (X/Y modification).
-                vertices.append([x, y, 0.0, gray, gray, gray]) 
-
-        self.original_vertices = np.array(vertices, dtype=np.float32)
-        self.vertices = self.original_vertices.copy()
-
-        # Create line indices for horizontal and vertical lines
-        indices = []
-        for j in range(self.rows):
-            for i in range(self.cols - 1):
-                start = j * self.cols + i
-                end = start + 1
-                indices.extend([start, end])
-
-        for i in range(self.cols):
-            for j in range(self.rows - 1):
-                start = j * self.cols + i
-                end = start + self.cols
-                indices.extend([start, end])
-
-        self.indices = np.array(indices, dtype=np.uint32)
+        xs = np.linspace(-1.1, 1.1, self.cols, dtype=np.float32)
+        ys = np.linspace(-1.1, 1.1, self.rows, dtype=np.float32)
+        grid_x, grid_y = np.meshgrid(xs, ys)  # (rows, cols), row-major like the indices
+
+        # No Z, as we are performing a 2D effect (X/Y modification).
+        self.original_positions = np.empty((self.rows * self.cols, 2), dtype=np.float32)
+        self.original_positions[:, 0] = grid_x.ravel()
+        self.original_positions[:, 1] = grid_y.ravel()
+        self.positions = self.original_positions.copy()
+        self.colors = np.full((self.rows * self.cols, 3), 0.2, dtype=np.float32)  # gray
+
+        # Open-grid coordinates for broadcasting: X varies along columns, Y along rows
+        self._grid_x = xs[None, :].copy()  # shape (1, cols)
+        self._grid_y = ys[:, None].copy()  # shape (rows, 1)
+
+        self.indices = _grid_line_indices(self.rows, self.cols)
 
     def add_gravitational_body(self, body):
         """
         Add a gravitational body (like a Circle with mass) that affects the fabric.
+        The body interface is checked here once instead of on every update.
         """
+        missing = [name for name in BODY_ATTRIBUTES if not hasattr(body, name)]
+        if missing:
+            raise TypeError(f"Gravitational body is missing {', '.join(missing)}")
+        if self.gpu_deformation and len(self.gravitational_bodies) >= MAX_BODIES:
+            raise ValueError(f"GPU fabric deformation supports at most {MAX_BODIES} bodies")
         self.gravitational_bodies.append(body)
+        self._resize_body_arrays()
 
     def remove_gravitational_body(self, body):
         """
@@ -67,79 +149,162 @@ class SpaceFabric:
         """
         if body in self.gravitational_bodies:
             self.gravitational_bodies.remove(body)
+            self._resize_body_arrays()
+
+    def _resize_body_arrays(self):
+        """Reallocate the per-body parameter arrays after the body list changed."""
+        count = len(self.gravitational_bodies)
+        self._body_x = np.empty(count, dtype=np.float32)
+        self._body_y = np.empty(count, dtype=np.float32)
+        self._body_md = np.empty(count, dtype=np.float32)
+        self._body_cutoff_sq = np.empty(count, dtype=np.float32)
+        self._body_mass = np.full(count, np.nan)  # NaN never matches, so every entry is recomputed
+
+    def _refresh_body_arrays(self):
+        """
+        Refill the per-body position arrays; max displacements are only recomputed
+        for bodies whose mass changed since the last refresh.
+        """
+        body_mass = self._body_mass
+        for k, body in enumerate(self.gravitational_bodies):
+            self._body_x[k] = body.x
+            self._body_y[k] = body.y
+            if body.mass != body_mass[k]:
+                body_mass[k] = body.mass
+                self._body_md[k] = self.max_displacement(body)
+
+    @staticmethod
+    def max_displacement(body):
+        """
+        Max displacement factor of a body based on its mass (tuned for clean visual effect).
+        """
+        mass_in_solar_units = body.mass / SOLAR_MASS
+        # Clamp the mass ratio effect to prevent extreme folding at very high masses
+        return min(0.05 * mass_in_solar_units, 0.15)
+
+    @staticmethod
+    def cutoff_distance_sq(max_displacement):
+        """
+        Squared distance beyond which a body's pull drops below PULL_EPSILON (Numba kernel only).
+        Solves max_displacement / (1 + (d / falloff)^2) = PULL_EPSILON for d^2.
+        """
+        return FALLOFF_RATE**2 * max(max_displacement / PULL_EPSILON - 1.0, 0.0)
+
+    def update_body_uniforms(self):
+        """
+        Push body positions and displacements to the fabric shader (GPU deformation path).
+        """
+        self._refresh_body_arrays()
+        count = len(self.gravitational_bodies)  # at most MAX_BODIES, see add_gravitational_body
+        self._body_uniforms[:count, 0] = self._body_x[:count]
+        self._body_uniforms[:count, 1] = self._body_y[:count]
+        self._body_uniforms[:count, 2] = self._body_md[:count]
+
+        self.program['u_num_bodies'].value = count
+        self.program['u_bodies'].write(self._body_uniforms)
 
     def update_fabric_deformation(self):
         """
-        Update the fabric deformation based on all gravitational bodies.
+        Update the fabric deformation based on all gravitational bodies and upload it.
         FIXED: Uses a smooth distance-based inward pull to prevent folding in 2D.
+        With GPU deformation there is nothing to do: draw() pushes the body uniforms.
         """
-        if self.original_vertices is None:
+        if self.original_positions is None or self.gpu_deformation:
+            return
+
+        # Body parameters as (M,) arrays so all bodies are applied in one pass
+        self._refresh_body_arrays()
+        body_x, body_y, body_md = self._body_x, self._body_y, self._body_md
+
+        # Deform directly inside the upload buffer, viewed as a (rows, cols, 2) grid
+        grid = self.positions.reshape(self.rows, self.cols, 2)
+
+        if _deform_kernel is not None:
+            # The per-vertex loop can skip bodies whose pull is negligible there
+            body_cutoff_sq = self._body_cutoff_sq
+            for k in range(len(body_md)):
+                body_cutoff_sq[k] = self.cutoff_distance_sq(body_md[k])
+            _deform_kernel(self._grid_x.ravel(), self._grid_y.ravel(),
+                           body_x, body_y, body_md, body_cutoff_sq, INV_FALLOFF_SQ, grid)
+            self.update_gpu_data()
             return
 
-        # Start by resetting the X and Y positions to their original flat state.
-        self.vertices[:, :2] = self.original_vertices[:, :2].copy()
-
-        # Apply deformation from each gravitational body
-        for body in self.gravitational_bodies:
-            if hasattr(body, 'get_gravitational_effect') and hasattr(body, 'mass'):
-                
-                # Calculate max displacement factor based on mass
-                solar_mass = 1.989e30
-                mass_in_solar_units = body.mass / solar_mass
-                # Max displacement factor (tuned for clean visual effect)
-                max_displacement = 0.05 * mass_in_solar_units 
-                # Clamp the mass ratio effect to prevent extreme folding at very high masses
-                max_displacement = min(max_displacement, 0.15) 
-
-                for i in range(len(self.vertices)):
-                    x, y = self.original_vertices[i, 0], self.original_vertices[i, 1]
-                    
-                    dx = x - body.x
-                    dy = y - body.y
-                    distance = np.sqrt(dx*dx + dy*dy)
-                    
-                    # 2D Curvature Logic: Smooth displacement
-                    # Normalized distance relative to a screen scale of 1.0
-                    normalized_distance = distance / 1.0
-                    
-                    # Displacement calculation using a smooth inverse-square-like falloff:
-                    # Displacement = Max_Displacement / (1 + (Normalized_Distance / Falloff_Rate)^2)
-                    falloff_rate = 0.35 # Slightly wider curve than before
-                    
-                    pull_magnitude = max_displacement / (1.0 + (normalized_distance / falloff_rate)**2)
-                    
-                    if distance > 1e-4: # Avoid division by zero
-                        # Normalize the direction vector and apply the pull magnitude
-                        pull_x = (dx / distance) * pull_magnitude
-                        pull_y = (dy / distance) * pull_magnitude
-                        
-                        # Apply the inward pull (subtract from current position)
-                        self.vertices[i, 0] -= pull_x
-                        self.vertices[i, 1] -= pull_y
-                    
-                    # Z remains 0.0
+        # Scratch buffers for the (rows, cols, M) intermediates, reused across updates
+        shape = (self.rows, self.cols, len(body_x))
+        if self._scratch is None or self._scratch[0].shape != shape:
+            self._scratch = [np.empty(shape, dtype=np.float32) for _ in range(4)]
+            self._scratch.append(np.empty(shape, dtype=bool))
+        dx, dy, distance_sq, scale, far = self._scratch
+
+        # (1, cols, M) and (rows, 1, M) offsets broadcast to (rows, cols, M)
+        np.subtract(self._grid_x[:, :, None], body_x, out=dx)
+        np.subtract(self._grid_y[:, :, None], body_y, out=dy)
+        np.multiply(dx, dx, out=distance_sq)
+        np.multiply(dy, dy, out=scale)
+        distance_sq += scale
+
+        # 2D Curvature Logic: Smooth displacement (the falloff only needs the squared distance)
+        # pull_magnitude = max_displacement / (1 + distance^2 / falloff^2)
+        np.multiply(distance_sq, INV_FALLOFF_SQ, out=scale)
+        scale += np.float32(1.0)
+        np.divide(body_md, scale, out=scale)
+
+        # Normalize the direction vector with a single inverse sqrt (reusing distance_sq);
+        # vertices on top of a body (distance <= 1e-4) are not moved by it
+        np.greater(distance_sq, MIN_DISTANCE_SQ, out=far)
+        np.sqrt(distance_sq, out=distance_sq)
+        np.divide(scale, distance_sq, out=scale, where=far)
+        scale *= far  # zero the pull where the division was skipped
+
+        # Apply the summed inward pull to the original flat positions
+        dx *= scale
+        dy *= scale
+        np.sum(dx, axis=2, out=grid[:, :, 0])
+        np.sum(dy, axis=2, out=grid[:, :, 1])
+        np.subtract(self._grid_x, grid[:, :, 0], out=grid[:, :, 0])
+        np.subtract(self._grid_y, grid[:, :, 1], out=grid[:, :, 1])
+
+        self.update_gpu_data()
 
     def setup_vao(self, ctx: moderngl.Context, program: moderngl.Program):
         """
         Upload vertex/index data to GPU and create VAO.
         """
         self.generate_base_grid()
-        self.vbo = ctx.buffer(self.vertices.tobytes())
-        self.ibo = ctx.buffer(self.indices.tobytes())
-        self.vao = ctx.vertex_array(program, [(self.vbo, '3f 3f', 'position', 'color')], self.ibo)
+        self.program = program
+        # The shader only exposes u_num_bodies when it deforms the grid itself
+        self.gpu_deformation = program.get('u_num_bodies', None) is not None
+        if self.gpu_deformation and len(self.gravitational_bodies) > MAX_BODIES:
+            raise ValueError(f"GPU fabric deformation supports at most {MAX_BODIES} bodies")
+        if self.gpu_deformation:
+            program['u_falloff'].value = FALLOFF_RATE
+        # Positions are rewritten on every CPU deformation update; colors rarely change
+        self.pos_vbo = ctx.buffer(self.positions, dynamic=not self.gpu_deformation)
+        self.col_vbo = ctx.buffer(self.colors)
+        self.ibo = ctx.buffer(self.indices)
+        self.vao = ctx.vertex_array(
+            program,
+            [(self.pos_vbo, '2f', 'position'), (self.col_vbo, '3f', 'color')],
+            self.ibo,
+            index_element_size=self.indices.itemsize,
+        )
 
     def update_gpu_data(self):
         """
-        Update the GPU buffer with the deformed vertex data.
+        Update the GPU position buffer with the deformed grid; colors stay untouched.
+        Nothing to upload with GPU deformation: the buffer keeps the flat grid.
         """
-        if self.vbo is not None:
-            self.vbo.write(self.vertices.tobytes())
+        if self.pos_vbo is not None and not self.gpu_deformation:
+            self.pos_vbo.write(self.positions)
 
     def draw(self, ctx):
         """
         Render the space fabric as a mesh/grid.
         """
         if self.vao is not None:
+            if self.gpu_deformation:
+                # Bodies are read at draw time, so the shader always sees their current state
+                self.update_body_uniforms()
             self.vao.render(mode=moderngl.LINES)
         else:
             print("SpaceFabric VAO not set up yet!")
@@ -147,18 +312,24 @@ class SpaceFabric:
     def set_grid_color_by_curvature(self):
         """
         Optional: Color the grid lines based on the amount of curvature.
+        Only meaningful on the CPU deformation path.
         """
-        if self.original_vertices is None or self.vertices is None:
+        if self.original_positions is None or self.positions is None:
             return
 
-        for i in range(len(self.vertices)):
-            orig_x, orig_y = self.original_vertices[i, 0], self.original_vertices[i, 1]
-            curr_x, curr_y = self.vertices[i, 0], self.vertices[i, 1]
-            
-            displacement = np.sqrt((curr_x - orig_x)**2 + (curr_y - orig_y)**2)
-            
-            color_intensity = 0.2 + min(displacement * 5.0, 0.6)
-            
-            self.vertices[i, 3] = color_intensity
-            self.vertices[i, 4] = color_intensity * 0.5
-            self.vertices[i, 5] = color_intensity * 0.2
\ No newline at end of file
+        offset = self.positions - self.original_positions
+        displacement_sq = offset[:, 0]**2 + offset[:, 1]**2
+
+        # color_intensity = 0.2 + min(displacement * 5.0, 0.6); the cap is checked on the
+        # squared displacement so the sqrt only runs for vertices below it
+        color_intensity = np.full(len(displacement_sq), 0.6, dtype=np.float32)
+        below_cap = displacement_sq < (0.6 / 5.0)**2
+        color_intensity[below_cap] = np.sqrt(displacement_sq[below_cap]) * 5.0
+        color_intensity += 0.2
+
+        self.colors[:, 0] = color_intensity
+        self.colors[:, 1] = color_intensity * 0.5
+        self.colors[:, 2] = color_intensity * 0.2
+
+        if self.col_vbo is not None:
+            self.col_vbo.write(self.colors)